@@ -5,11 +5,14 @@ from setuptools import setup, find_packages
 
 # Core dependencies required for both scraping and web
 base_requirements = [
-    "beautifulsoup4==4.12.3",
-    "bs4==0.0.2",
     "requests==2.32.3",
     "selenium==4.27.1",
-    "pandas==2.2.3"
+    "pandas==2.2.3",
+    "pyarrow==18.1.0",
+    "aiohttp==3.11.11",
+    "aiohttp-client-cache==0.12.4",
+    "aiosqlite==0.20.0",
+    "lxml==5.3.0"
 ]
 
 
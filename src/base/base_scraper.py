@@ -2,12 +2,21 @@
 Base classes for school scraping and enrichment functionality.
 """
 
+import asyncio
 import logging
-import time
+import os
+import threading
 from abc import ABC, abstractmethod
-from typing import Dict, List, Optional, Set
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional, Set, Tuple, Union
 
+import aiohttp
 import pandas as pd
+from aiohttp_client_cache import CachedSession, SQLiteBackend
+from base.browser_pool import POOL_SIZE, BrowserPool
+from base.checkpoint import JsonlCheckpoint
+from base.rate_limiter import RateLimiter
+from base.sinks import CsvSink, ParquetSink, open_sink
 from selenium import webdriver
 from selenium.common.exceptions import TimeoutException
 from selenium.webdriver.chrome.options import Options
@@ -16,51 +25,183 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.ui import WebDriverWait
 
 
-class BaseWebDriver:
-    """Base class for managing WebDriver setup and common operations."""
+async def fetch(
+    session: CachedSession,
+    url: str,
+    sem: asyncio.BoundedSemaphore,
+    rate_limiter: Optional[RateLimiter] = None,
+) -> str:
+    """Fetch the raw HTML of a page, bounded by the shared semaphore."""
+    async with sem:
+        # Fresh cached pages don't hit the server, so they skip the rate limit.
+        # get_response drops expired entries, unlike has_url.
+        if rate_limiter:
+            key = session.cache.create_key("GET", url)
+            if await session.cache.get_response(key) is None:
+                await rate_limiter.acquire_async()
+        async with session.get(url, timeout=aiohttp.ClientTimeout(total=20)) as r:
+            r.raise_for_status()
+            return await r.text()
+
+
+def create_browser_pool(headless: bool = True, size: int = POOL_SIZE) -> BrowserPool:
+    """Create a browser pool to share between scrapers and enrichers."""
+    return BrowserPool(BaseWebDriver(headless).create_driver, size)
+
+
+def configure_logging(level: int = logging.INFO):
+    """Configure logging once for the whole process."""
+    logging.basicConfig(
+        level=level, format="%(asctime)s - %(levelname)s - %(message)s"
+    )
+
+
+def read_table(
+    filename: str, dtypes: Optional[Dict[str, str]] = None
+) -> pd.DataFrame:
+    """Read a scraped table, Parquet if it ends in .parquet, CSV otherwise.
+
+    Columns listed in dtypes are loaded with those types, when present.
+    """
+    if filename.endswith(".parquet"):
+        df = pd.read_parquet(filename)
+        if dtypes:
+            df = df.astype({c: t for c, t in dtypes.items() if c in df.columns})
+        return df
+    return pd.read_csv(filename, dtype=dtypes, engine="pyarrow")
 
-    def __init__(self, headless: bool = True):
+
+def has_values(new_data: Dict) -> bool:
+    """Check if extracted data has at least one value, failures have none."""
+    return any(value is not None for value in new_data.values())
+
+
+def write_csv(df: pd.DataFrame, filename: str):
+    """Write a dataframe to CSV through a large buffer.
+
+    pyarrow's writer quotes every string cell, so pandas is used to keep the
+    minimal quoting of the existing datasets.
+    """
+    with open(filename, "w", newline="", buffering=1 << 20) as f:
+        df.to_csv(f, index=False)
+
+
+class BaseWebDriver:
+    """Base class for managing WebDriver setup and common operations.
+
+    An injected pool overrides `headless` and `workers`: its drivers use the
+    options of whoever created the pool, and its size sets the parallelism.
+    """
+
+    page_load_timeout = 8
+    # Third-party trackers and ads that can hold up a page load
+    blocked_urls = [
+        "*googletagmanager*",
+        "*google-analytics*",
+        "*doubleclick*",
+        "*facebook.net*",
+        "*hotjar*",
+    ]
+
+    def __init__(
+        self,
+        headless: bool = True,
+        pool: Optional[BrowserPool] = None,
+        workers: Optional[int] = None,
+    ):
         self.options = self._configure_chrome_options(headless)
         self.driver = None
         self.wait = None
-
-        # Configure logging
-        logging.basicConfig(
-            level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
-        )
+        # Drivers come from a pool, shared if injected, otherwise our own
+        # with one driver per worker
+        self.pool = pool
+        self.workers = workers or POOL_SIZE
+        self._owns_pool = pool is None
         self.logger = logging.getLogger(self.__class__.__name__)
+        if pool is not None and workers is not None and workers != pool.size:
+            self.logger.warning(
+                f"Using the injected pool of {pool.size} browsers, "
+                f"not {workers} workers"
+            )
 
     def _configure_chrome_options(self, headless: bool) -> Options:
         """Configure Chrome WebDriver options."""
         options = Options()
         if headless:
-            options.add_argument("--headless")
+            options.add_argument("--headless=new")
+            options.add_argument("--disable-gpu")
         options.add_argument("--window-size=1024,768")
         options.add_argument("--no-sandbox")
         options.add_argument("--disable-dev-shm-usage")
+
+        # Only the HTML is needed, skip images, stylesheets and notifications
+        options.add_experimental_option(
+            "prefs",
+            {
+                "profile.managed_default_content_settings.images": 2,
+                "profile.managed_default_content_settings.stylesheets": 2,
+                "profile.default_content_setting_values.notifications": 2,
+            },
+        )
+        options.add_argument("--blink-settings=imagesEnabled=false")
+        # Return from driver.get on DOMContentLoaded instead of the load event
+        options.page_load_strategy = "eager"
         return options
 
-    def setup_driver(self):
-        """Initialize WebDriver with configured options."""
+    def create_driver(self) -> webdriver.Chrome:
+        """Start a new WebDriver with configured options."""
         try:
-            self.driver = webdriver.Chrome(options=self.options)
-            self.wait = WebDriverWait(self.driver, 10)
+            driver = webdriver.Chrome(options=self.options)
+            driver.set_page_load_timeout(self.page_load_timeout)
+            driver.execute_cdp_cmd("Network.enable", {})
+            driver.execute_cdp_cmd(
+                "Network.setBlockedURLs", {"urls": self.blocked_urls}
+            )
             self.logger.info("WebDriver initialized successfully")
+            return driver
         except Exception as e:
             self.logger.error(f"Failed to initialize WebDriver: {str(e)}")
             raise
 
+    def load_page(self, driver: webdriver.Remote, url: str):
+        """Open a URL, stopping the load once the page load timeout is reached.
+
+        The page is usually usable by then, callers wait for what they need.
+        """
+        try:
+            driver.get(url)
+        except TimeoutException:
+            self.logger.warning(f"Page load timed out: {url}")
+            driver.execute_script("window.stop();")
+
+    def ensure_pool(self) -> BrowserPool:
+        """Return the browser pool, creating our own if none was injected."""
+        if self.pool is None:
+            self.pool = BrowserPool(self.create_driver, self.workers)
+        return self.pool
+
+    def setup_driver(self):
+        """Lease a WebDriver from the pool."""
+        self.driver = self.ensure_pool().acquire()
+        self.wait = WebDriverWait(self.driver, 10)
+
     def wait_for_element(
-        self, by: By, selector: str, timeout: int = 10, condition: str = "presence"
+        self,
+        by: By,
+        selector: str,
+        timeout: int = 10,
+        condition: str = "presence",
+        driver: Optional[webdriver.Remote] = None,
     ) -> Optional[webdriver.remote.webelement.WebElement]:
         """Wait for an element with configurable conditions."""
+        driver = driver or self.driver
         try:
             if condition == "clickable":
-                element = WebDriverWait(self.driver, timeout).until(
+                element = WebDriverWait(driver, timeout).until(
                     EC.element_to_be_clickable((by, selector))
                 )
             else:
-                element = WebDriverWait(self.driver, timeout).until(
+                element = WebDriverWait(driver, timeout).until(
                     EC.presence_of_element_located((by, selector))
                 )
             return element
@@ -69,20 +210,37 @@ class BaseWebDriver:
             return None
 
     def cleanup(self):
-        """Clean up WebDriver resources."""
+        """Return the WebDriver to its pool, closing the pool if we own it."""
         if self.driver:
-            self.driver.quit()
-            self.logger.info("WebDriver closed")
+            self.pool.release(self.driver)
+            self.driver = None
+            self.wait = None
+        if self.pool and self._owns_pool:
+            self.pool.close()
+            self.pool = None
 
 
 class BaseSchoolScraper(BaseWebDriver, ABC):
     """Abstract base class for school scraping functionality."""
 
-    def __init__(self, headless: bool = True):
-        super().__init__(headless)
-        self.schools_data: List[Dict] = []
-        self.processed_urls: Set[str] = set()
-        self.current_page = 1
+    # Columns of the output CSV, in order
+    fieldnames: List[str] = []
+
+    def __init__(
+        self,
+        headless: bool = True,
+        pool: Optional[BrowserPool] = None,
+        workers: Optional[int] = None,
+    ):
+        super().__init__(headless, pool, workers)
+        # Schools already written, keyed by an int id rather than the full URL
+        # so entries stay small and hash in constant time
+        self.processed_ids: Set[int] = set()
+        self.schools_count = 0
+        # Guards processed_ids and the output file when pages are scraped
+        # from several threads
+        self._lock = threading.RLock()
+        self._sink: Optional[Union[CsvSink, ParquetSink]] = None
 
     @abstractmethod
     def apply_filters(self, filters: List[str]):
@@ -91,14 +249,32 @@ class BaseSchoolScraper(BaseWebDriver, ABC):
 
     @abstractmethod
     def get_table_data(self):
-        """Extract school data from the current page."""
+        """Extract school data from every results page."""
         pass
 
+    def open_output(self, filename: str):
+        """Open the output file, Parquet if it ends in .parquet, CSV otherwise."""
+        self._sink = open_sink(filename, self.fieldnames)
+
+    def add_schools(self, schools: List[Dict]):
+        """Stream a batch of scraped schools to the output file."""
+        with self._lock:
+            self._sink.write(schools)
+            self.schools_count += len(schools)
+
     def save_data(self, filename: str):
-        """Save scraped data to CSV file."""
-        df = pd.DataFrame(self.schools_data)
-        df.to_csv(filename, index=False)
-        self.logger.info(f"Data saved to {filename}")
+        """Flush and close the output file."""
+        if self._sink:
+            self._sink.close()
+            self._sink = None
+            self.logger.info(f"{self.schools_count} schools saved to {filename}")
+
+    def cleanup(self):
+        """Clean up WebDriver resources and close the output file."""
+        if self._sink:
+            self._sink.close()
+            self._sink = None
+        super().cleanup()
 
     @abstractmethod
     def run(self, filters: List[str], output_file: str):
@@ -109,84 +285,286 @@ class BaseSchoolScraper(BaseWebDriver, ABC):
 class BaseSchoolEnricher(BaseWebDriver, ABC):
     """Abstract base class for enriching school data with additional information."""
 
-    def __init__(self, input_csv: str, headless: bool = True):
-        super().__init__(headless)
+    max_concurrency = 64
+    max_per_host = 16
+    batch_size = 200
+    requests_per_second = 4
+    fetches_per_second = 10
+    parse_workers = 4
+    cache_name = "enrich_cache"
+    cache_expire_after = 7 * 24 * 3600
+    # Opt-in: fetch only the first rows of each group, and copy their data to the
+    # rest of the group when it is the same for every sampled row
+    group_column: Optional[str] = None
+    group_fields: List[str] = []
+    group_sample_size = 2
+    # Types of the input columns, the others are inferred
+    column_dtypes: Dict[str, str] = {}
+
+    def __init__(
+        self,
+        input_csv: str,
+        headless: bool = True,
+        workers: Optional[int] = None,
+        pool: Optional[BrowserPool] = None,
+    ):
+        super().__init__(headless, pool, workers)
         self.input_csv = input_csv
         self.df = None
         self.processed_count = 0
+        self.checkpoint = JsonlCheckpoint(f"{input_csv}.ckpt.jsonl")
+        self.rate_limiter = RateLimiter(self.requests_per_second)
 
     @abstractmethod
-    def extract_additional_data(self, row: pd.Series) -> Dict:
-        """Extract additional data for a school."""
+    def extract_additional_data(
+        self, row: pd.Series, driver: webdriver.Remote
+    ) -> Dict:
+        """Extract additional data for a school from the page loaded in the driver."""
         pass
 
-    def process_school(self, row: pd.Series) -> pd.Series:
-        """Process a single school and update its information."""
-        try:
-            self.logger.info(f"Processing school: {row['name']}")
-
-            # Skip if already has complete data
-            if self.has_complete_data(row):
-                self.logger.info(f"Skipping {row['name']} - already has complete data")
-                return row
-
-            self.driver.get(row["url"])
-
-            # Get additional data
-            new_data = self.extract_additional_data(row)
-
-            # Update row with new data
-            for key, value in new_data.items():
-                if value and pd.isna(row[key]):
-                    row[key] = value
-                    self.logger.info(f"Updated {key} for {row['name']}: {value}")
+    @staticmethod
+    @abstractmethod
+    def parse_additional_data(html: str) -> Dict:
+        """Extract additional data for a school from its raw HTML.
 
-            time.sleep(1)  # Rate limiting
-            self.processed_count += 1
+        Runs in a worker process, so it must not depend on instance state.
+        """
+        pass
 
-            if self.processed_count % 10 == 0:
-                self.logger.info(f"Processed {self.processed_count} schools")
+    @abstractmethod
+    def is_rendered(self, html: str) -> bool:
+        """Cheaply check if the raw HTML may contain the data, without running JS.
 
-            return row
+        Pages that pass but yield no data when parsed still go to the browser.
+        """
+        pass
 
+    async def process_schools(
+        self, parser: ProcessPoolExecutor, batch: List[int], pages: List
+    ) -> List[int]:
+        """Parse fetched school pages in worker processes and store the results.
+
+        Returns the indices of rows whose pages need a browser to render.
+        """
+        loop = asyncio.get_running_loop()
+        fallback, parsed, futures = [], [], []
+        for index, html in zip(batch, pages):
+            if isinstance(html, Exception):
+                self.logger.warning(
+                    f"Failed to fetch {self.df.at[index, 'url']}: {str(html)}"
+                )
+                html = None
+            if html is None or not self.is_rendered(html):
+                fallback.append(index)
+                continue
+            parsed.append(index)
+            futures.append(
+                loop.run_in_executor(parser, self.parse_additional_data, html)
+            )
+
+        updates = []
+        results = await asyncio.gather(*futures, return_exceptions=True)
+        for index, new_data in zip(parsed, results):
+            if isinstance(new_data, Exception):
+                self.logger.error(
+                    f"Error parsing {self.df.at[index, 'name']}: {str(new_data)}"
+                )
+                new_data = {}
+            # is_rendered only looks for hints in the raw HTML, e.g. an app
+            # shell can mention the label in a script, let the browser retry
+            if not has_values(new_data):
+                fallback.append(index)
+                continue
+            updates.append((index, new_data))
+            self.record_result(index, new_data)
+        self.apply_updates(updates)
+
+        return fallback
+
+    def process_school_with_driver(self, row: pd.Series) -> Dict:
+        """Load a school page in a pooled WebDriver and extract its data."""
+        try:
+            self.logger.debug("Processing school with WebDriver: %s", row["name"])
+            with self.pool.lease() as driver:
+                self.rate_limiter.acquire()
+                self.load_page(driver, row["url"])
+                return self.extract_additional_data(row, driver)
         except Exception as e:
             self.logger.error(f"Error processing {row['name']}: {str(e)}")
-            return row
+            return {}
 
     @abstractmethod
     def has_complete_data(self, row: pd.Series) -> bool:
         """Check if a school record already has complete data."""
         pass
 
+    @classmethod
+    @abstractmethod
+    def incomplete_mask(cls, df: pd.DataFrame) -> pd.Series:
+        """Boolean mask of the rows that still need enrichment, in one pass."""
+        pass
+
+    def apply_updates(self, updates: List[Tuple[int, Dict]]):
+        """Fill missing values in the dataframe with a batch of extracted data."""
+        if not updates:
+            return
+        df = self.df
+        delta = pd.DataFrame(
+            [{"idx": index, **new_data} for index, new_data in updates]
+        ).set_index("idx")
+        cols = [c for c in delta.columns if c in df.columns]
+        if cols:
+            for col in cols:
+                # Columns inferred as float because they were all empty
+                if not pd.api.types.is_string_dtype(df[col].dtype):
+                    df[col] = df[col].astype(object)
+            df.loc[delta.index, cols] = df.loc[delta.index, cols].fillna(delta[cols])
+
+        self.processed_count += len(updates)
+        self.logger.info(f"Processed {self.processed_count} schools")
+
+    def record_result(self, index: int, new_data: Dict):
+        """Append a processed school to the checkpoint, unless it failed.
+
+        Failed schools are left out so a resumed run retries them.
+        """
+        if has_values(new_data):
+            self.checkpoint.write({"url": self.df.at[index, "url"], **new_data})
+
+    async def fetch_pages(self, indices: List[int]) -> List[int]:
+        """Fetch and parse school pages concurrently.
+
+        Returns the indices of rows whose pages need a browser to render.
+        """
+        df = self.df
+        parsing = []
+        sem = asyncio.BoundedSemaphore(self.max_concurrency)
+        rate_limiter = RateLimiter(self.fetches_per_second)
+        # Every school lives on the same host, keep its connections and DNS entry
+        connector = aiohttp.TCPConnector(
+            limit_per_host=self.max_per_host, ttl_dns_cache=3600
+        )
+
+        cache = SQLiteBackend(self.cache_name, expire_after=self.cache_expire_after)
+
+        with ProcessPoolExecutor(max_workers=self.parse_workers) as parser:
+            async with CachedSession(cache=cache, connector=connector) as session:
+                for start in range(0, len(indices), self.batch_size):
+                    batch = indices[start : start + self.batch_size]
+                    tasks = [
+                        fetch(session, df.at[i, "url"], sem, rate_limiter)
+                        for i in batch
+                    ]
+                    pages = await asyncio.gather(*tasks, return_exceptions=True)
+
+                    # Parse this batch while the next one is being fetched
+                    parsing.append(
+                        asyncio.create_task(self.process_schools(parser, batch, pages))
+                    )
+
+            fallback = await asyncio.gather(*parsing)
+
+        return [index for rows in fallback for index in rows]
+
+    def split_groups(self, pending: List[int]) -> Tuple[List[int], List[int]]:
+        """Split pending rows into group samples to fetch and rows to defer."""
+        rows = self.df.loc[pending, self.group_column]
+        rank = rows.groupby(rows, sort=False).cumcount()
+        # Rows without a group value are always fetched
+        sample = rank.lt(self.group_sample_size) | rows.isna()
+        return rows.index[sample].tolist(), rows.index[~sample].tolist()
+
+    def propagate_group_data(
+        self, sampled: List[int], deferred: List[int]
+    ) -> List[int]:
+        """Copy data shared by every sampled row of a group to its deferred rows.
+
+        Returns the deferred rows whose group has no shared data, to be fetched.
+        """
+        df, col, fields = self.df, self.group_column, self.group_fields
+        grouped = df.loc[sampled].groupby(col)[fields]
+        # A group is uniform when enough rows were sampled and all of them
+        # have the same, non-missing value for every field
+        uniform = (
+            grouped.size().ge(self.group_sample_size)
+            & grouped.count().eq(grouped.size(), axis=0).all(axis=1)
+            & grouped.nunique().eq(1).all(axis=1)
+        )
+        shared = grouped.first()[uniform]
+
+        rows = df.loc[deferred, col]
+        hit = rows.isin(shared.index)
+        copied = rows.index[hit]
+        updates = list(zip(copied, shared.reindex(rows[hit]).to_dict("records")))
+        for index, new_data in updates:
+            self.record_result(index, new_data)
+        self.apply_updates(updates)
+
+        self.logger.info(f"Copied {col} data to {len(updates)} schools")
+        return rows.index[~hit].tolist()
+
+    def enrich(self, indices: List[int]):
+        """Fetch and store the data of the given rows, using a browser if needed."""
+        # Fetch static pages concurrently
+        self.logger.info(f"Starting to process {len(indices)} schools")
+        fallback = asyncio.run(self.fetch_pages(indices))
+
+        # Fall back to the WebDriver for JS-rendered pages
+        if fallback:
+            self.logger.info(f"Loading {len(fallback)} schools with WebDriver")
+            pool = self.ensure_pool()
+            updates = []
+            with ThreadPoolExecutor(max_workers=pool.size) as executor:
+                futures = {
+                    executor.submit(
+                        self.process_school_with_driver, self.df.loc[index]
+                    ): index
+                    for index in fallback
+                }
+                for future in as_completed(futures):
+                    index, new_data = futures[future], future.result()
+                    updates.append((index, new_data))
+                    self.record_result(index, new_data)
+            self.apply_updates(updates)
+
     def run(self):
         """Main execution method."""
         try:
             # Load CSV
             self.logger.info(f"Loading data from {self.input_csv}")
-            self.df = pd.read_csv(self.input_csv)
+            self.df = read_table(self.input_csv, self.column_dtypes)
             total_schools = len(self.df)
 
-            # Setup WebDriver
-            self.setup_driver()
-
-            # Process each school
-            self.logger.info(f"Starting to process {total_schools} schools")
-            updated_df = self.df.copy()
-
-            for index, row in updated_df.iterrows():
-                updated_row = self.process_school(row)
-                updated_df.iloc[index] = updated_row
-
-                # Save progress every 50 schools
-                if (index + 1) % 50 == 0:
-                    self.logger.info("Saving intermediate progress...")
-                    updated_df.to_csv(f"intermediate_{self.input_csv}", index=False)
+            # Restore schools processed by an interrupted run
+            done = self.checkpoint.load()
+            if done:
+                self.logger.info(f"Resuming with {len(done)} schools from checkpoint")
+                self.apply_updates(
+                    [(i, done[url]) for i, url in self.df["url"].items() if url in done]
+                )
+            self.checkpoint.start()
+
+            # Skip schools that already have complete data
+            mask = self.incomplete_mask(self.df) & ~self.df["url"].isin(done)
+            pending = self.df.index[mask].tolist()
+
+            if not pending:
+                self.logger.info("Nothing to enrich")
+            elif self.group_column:
+                sampled, deferred = self.split_groups(pending)
+                self.enrich(sampled)
+                remaining = self.propagate_group_data(sampled, deferred)
+                if remaining:
+                    self.enrich(remaining)
+            else:
+                self.enrich(pending)
 
             # Save final results
-            output_file = f"enriched_{self.input_csv}"
-            updated_df.to_csv(output_file, index=False)
+            output_file = f"enriched_{os.path.splitext(self.input_csv)[0]}.csv"
+            write_csv(self.df, output_file)
+            self.checkpoint.remove()
 
-            self.log_final_statistics(updated_df, total_schools, output_file)
+            self.log_final_statistics(self.df, total_schools, output_file)
 
         except Exception as e:
             self.logger.error(f"Fatal error during enrichment: {str(e)}")
@@ -195,6 +573,11 @@ class BaseSchoolEnricher(BaseWebDriver, ABC):
         finally:
             self.cleanup()
 
+    def cleanup(self):
+        """Clean up WebDriver resources and stop the checkpoint writer."""
+        super().cleanup()
+        self.checkpoint.close()
+
     @abstractmethod
     def log_final_statistics(
         self, df: pd.DataFrame, total_schools: int, output_file: str
@@ -0,0 +1,108 @@
+"""
+Pool of WebDriver instances shared between worker threads.
+"""
+
+import logging
+import queue
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional
+
+from selenium import webdriver
+
+POOL_SIZE = 4
+# Restart a driver after this many pages to bound Chrome's memory growth
+MAX_PAGES_PER_DRIVER = 1500
+
+
+class BrowserPool:
+    """Fixed-size pool of WebDriver instances, started lazily on first use.
+
+    A pool can be shared between a scraper and an enricher so Chrome is only
+    started once for the whole pipeline. Drivers are leased with `acquire`
+    and handed back with `release`, and are restarted once they have served
+    `max_pages` pages.
+    """
+
+    def __init__(
+        self,
+        create_driver: Callable[[], webdriver.Remote],
+        size: int = POOL_SIZE,
+        max_pages: int = MAX_PAGES_PER_DRIVER,
+    ):
+        self.size = size
+        self.max_pages = max_pages
+        self._create_driver = create_driver
+        # None marks a free slot whose driver has not been started yet
+        self._idle: queue.Queue = queue.Queue(maxsize=size)
+        for _ in range(size):
+            self._idle.put(None)
+        self._drivers: List[webdriver.Remote] = []
+        self._pages_served: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    def acquire(self) -> webdriver.Remote:
+        """Take an idle driver, starting one if its slot is empty."""
+        driver: Optional[webdriver.Remote] = self._idle.get()
+        if driver is not None:
+            return driver
+
+        try:
+            driver = self._create_driver()
+        except Exception:
+            self._idle.put(None)
+            raise
+
+        with self._lock:
+            self._drivers.append(driver)
+            self._pages_served[id(driver)] = 0
+            self.logger.info(f"Started driver {len(self._drivers)} of {self.size}")
+        return driver
+
+    def release(self, driver: webdriver.Remote, pages: int = 1):
+        """Return a driver to the pool after it served `pages` pages."""
+        with self._lock:
+            served = self._pages_served.get(id(driver), 0) + pages
+            self._pages_served[id(driver)] = served
+            recycle = served >= self.max_pages
+            if recycle:
+                self._drivers.remove(driver)
+                del self._pages_served[id(driver)]
+
+        if recycle:
+            self.logger.info(f"Restarting driver after {served} pages")
+            self._quit(driver)
+            self._idle.put(None)
+        else:
+            self._idle.put(driver)
+
+    @contextmanager
+    def lease(self) -> Iterator[webdriver.Remote]:
+        """Borrow a driver for one page for the duration of a with block."""
+        driver = self.acquire()
+        try:
+            yield driver
+        finally:
+            self.release(driver)
+
+    def close(self):
+        """Quit every driver started by the pool."""
+        with self._lock:
+            for driver in self._drivers:
+                self._quit(driver)
+            self._drivers.clear()
+            self._pages_served.clear()
+
+            # Empty every slot so the pool can be used again
+            while not self._idle.empty():
+                self._idle.get_nowait()
+            for _ in range(self.size):
+                self._idle.put(None)
+        self.logger.info("Browser pool closed")
+
+    def _quit(self, driver: webdriver.Remote):
+        try:
+            driver.quit()
+        except Exception as e:
+            self.logger.error(f"Failed to quit driver: {str(e)}")
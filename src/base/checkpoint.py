@@ -0,0 +1,75 @@
+"""
+Append-only JSONL checkpoint for resuming interrupted enrichment runs.
+"""
+
+import json
+import logging
+import os
+import queue
+import threading
+from typing import Dict, Optional
+
+_STOP = object()
+
+
+class JsonlCheckpoint:
+    """Append-only JSONL file of processed records, written by a single thread."""
+
+    def __init__(self, path: str, key: str = "url"):
+        self.path = path
+        self.key = key
+        self._queue: queue.Queue = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    def load(self) -> Dict[str, Dict]:
+        """Replay the checkpoint file, returning records by key."""
+        records = {}
+        if not os.path.exists(self.path):
+            return records
+
+        with open(self.path) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # The last line may be truncated if the run was killed
+                    self.logger.warning(f"Skipping malformed line in {self.path}")
+                    continue
+                records[record.pop(self.key)] = record
+
+        self.logger.info(f"Loaded {len(records)} records from {self.path}")
+        return records
+
+    def start(self):
+        """Start the background writer thread."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._write_loop, daemon=True)
+            self._thread.start()
+
+    def write(self, record: Dict):
+        """Queue a record to be appended to the checkpoint file."""
+        self._queue.put(record)
+
+    def close(self):
+        """Flush pending records and stop the writer thread."""
+        if self._thread is not None:
+            self._queue.put(_STOP)
+            self._thread.join()
+            self._thread = None
+
+    def remove(self):
+        """Delete the checkpoint file once it is no longer needed."""
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def _write_loop(self):
+        with open(self.path, "a", buffering=1 << 20) as f:
+            while True:
+                record = self._queue.get()
+                if record is _STOP:
+                    break
+                f.write(json.dumps(record) + "\n")
+                if self._queue.empty():
+                    f.flush()
@@ -0,0 +1,42 @@
+"""
+Thread-safe token bucket rate limiter shared between workers.
+"""
+
+import asyncio
+import threading
+import time
+from typing import Optional
+
+
+class RateLimiter:
+    """Token bucket allowing `rate` requests per second across all threads."""
+
+    def __init__(self, rate: float, capacity: Optional[int] = None):
+        self.rate = rate
+        self.capacity = capacity or max(1, int(rate))
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """Take a token if available, otherwise return how long to wait for one."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.capacity, self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0
+            return (1 - self._tokens) / self.rate
+
+    def acquire(self):
+        """Block until a request is allowed."""
+        while wait := self._reserve():
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        """Wait without blocking the event loop until a request is allowed."""
+        while wait := self._reserve():
+            await asyncio.sleep(wait)
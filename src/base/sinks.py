@@ -0,0 +1,82 @@
+"""
+Output sinks that stream scraped records to disk as they are found.
+"""
+
+import csv
+from typing import Dict, List, Optional
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+
+class CsvSink:
+    """Stream records to a CSV file through a large userland buffer."""
+
+    def __init__(self, filename: str, fieldnames: List[str]):
+        self._file = open(filename, "w", newline="", buffering=1 << 20)
+        self._writer = csv.DictWriter(self._file, fieldnames=fieldnames)
+        self._writer.writeheader()
+
+    def write(self, records: List[Dict]):
+        """Append records to the file."""
+        self._writer.writerows(records)
+
+    def close(self):
+        """Flush and close the file."""
+        self._file.close()
+
+
+class ParquetSink:
+    """Stream records to a zstd-compressed Parquet file in large row groups."""
+
+    def __init__(
+        self, filename: str, fieldnames: List[str], row_group_size: int = 10_000
+    ):
+        self.filename = filename
+        self.fieldnames = fieldnames
+        self.row_group_size = row_group_size
+        self._buffer: List[Dict] = []
+        self._writer: Optional[pq.ParquetWriter] = None
+
+    def write(self, records: List[Dict]):
+        """Buffer records, writing a row group once enough are collected."""
+        self._buffer.extend(records)
+        if len(self._buffer) >= self.row_group_size:
+            self._flush()
+
+    def close(self):
+        """Write the remaining records and close the file."""
+        self._flush()
+        if self._writer is None:
+            # Nothing was scraped, still leave a readable file with the columns
+            self._open(pa.schema([(name, pa.string()) for name in self.fieldnames]))
+        self._writer.close()
+
+    def _open(self, schema: pa.Schema):
+        self._writer = pq.ParquetWriter(self.filename, schema, compression="zstd")
+
+    def _flush(self):
+        if not self._buffer:
+            return
+        columns = {
+            name: [r.get(name) for r in self._buffer] for name in self.fieldnames
+        }
+        self._buffer = []
+
+        if self._writer is None:
+            # Columns that are still all null (phone, website) are strings
+            table = pa.table(columns)
+            schema = pa.schema(
+                pa.field(f.name, pa.string()) if pa.types.is_null(f.type) else f
+                for f in table.schema
+            )
+            self._open(schema)
+        table = pa.table(columns, schema=self._writer.schema)
+        self._writer.write_table(table)
+
+
+def open_sink(filename: str, fieldnames: List[str]):
+    """Open a sink for the output file, picking the format from its extension."""
+    if filename.endswith(".parquet"):
+        return ParquetSink(filename, fieldnames)
+    return CsvSink(filename, fieldnames)
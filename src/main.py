@@ -1,22 +1,25 @@
 """
 Example usage of the school scraper framework.
 """
+from base.base_scraper import configure_logging
 from scrapers.texas import TexasSchoolScraper, TexasSchoolEnricher
 
 def scrape_texas_schools():
-    # Scrape basic data
+    # Scrape basic data, in a visible browser
     scraper = TexasSchoolScraper(headless=False)
     scraper.run(
         filters=["Prekindergarten", "Kindergarten", "Early Education"],
-        output_file="texas_schools_basic_data.csv"
+        output_file="texas_schools_basic_data.parquet"
     )
 
-    # Enrich data
-    enricher = TexasSchoolEnricher("texas_schools_basic_data.csv")
+    # Enrich data, headless. A shared pool would apply the scraper's options
+    # to both steps, see create_browser_pool
+    enricher = TexasSchoolEnricher("texas_schools_basic_data.parquet")
     enricher.run()
 
 
 if __name__ == "__main__":
+    configure_logging()
+
     # Run scraper for desired state
     scrape_texas_schools()
-  
\ No newline at end of file
@@ -3,128 +3,347 @@ Texas-specific implementation of school scraping and enrichment.
 """
 
 import re
-import time
-from typing import Dict, List
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Final, List, Optional, Set
+from urllib.parse import parse_qs, urlencode, urlparse, urlunparse
 
+import lxml.html
 import pandas as pd
-from base.base_scraper import BaseSchoolEnricher, BaseSchoolScraper
-from bs4 import BeautifulSoup
-from selenium.common.exceptions import (
-    ElementClickInterceptedException,
-    StaleElementReferenceException,
+from base.base_scraper import (
+    BaseSchoolEnricher,
+    BaseSchoolScraper,
+    configure_logging,
+    create_browser_pool,
 )
+from base.browser_pool import BrowserPool
+from lxml import etree
+from selenium import webdriver
+from selenium.common.exceptions import TimeoutException
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
+from selenium.webdriver.support.ui import WebDriverWait
+
+_ID_RE = re.compile(r"[?&]id=(\d+)")
+_PHONE_LABEL_RE = re.compile(r"PHONE:", re.IGNORECASE)
+
+# Locators, built once and shared by Selenium lookups and in-page scripts
+_FILTER_INPUT: Final = (By.CSS_SELECTOR, '[placeholder="Select a grade level"]')
+_CHIP: Final = (By.CSS_SELECTOR, ".MuiAutocomplete-root .MuiChip-root")
+_ROW_CSS: Final = "table tbody tr"
+_NEXT_CSS: Final = "button[aria-label*='Go to next page']"
+_DETAILS_CSS: Final = ".jss16"
+_WEBSITE_CSS: Final = ".MuiButtonBase-root[href]"
+
+# Times a results page is loaded before giving up on it
+MAX_RETRIES: Final = 3
+# Unreadable pages in a row after which a worker assumes it is past the last page
+MAX_CONSECUTIVE_SKIPS: Final = 2
+
+# Waits for the results table, then reads every row and whether there is a
+# next page, all in one WebDriver round trip; resolves to null on timeout.
+_PAGE_JS = """
+const done = arguments[arguments.length - 1];
+const [timeout, rowCss, nextCss] = arguments;
+const deadline = Date.now() + timeout;
+const text = (el) => (el ? el.textContent.trim() : null);
+
+function read() {
+    const rows = document.querySelectorAll(rowCss);
+    if (!rows.length) {
+        if (Date.now() < deadline) {
+            setTimeout(read, 100);
+        } else {
+            done(null);
+        }
+        return;
+    }
+
+    const next = document.querySelector(nextCss);
+    done({
+        rows: Array.from(rows).map((r) => {
+            const c = r.children;
+            const a = c[0] && c[0].querySelector("a");
+            return {
+                name: text(a),
+                url: a ? a.href : null,
+                district: text(c[1] && c[1].querySelector("a")),
+                address: text(c[2] && c[2].querySelector("div")),
+                grades: text(c[3]),
+            };
+        }),
+        hasNext: Boolean(
+            next && !next.disabled && !next.className.includes("disabled")
+        ),
+    });
+}
+
+read();
+"""
+
+# School details, compiled once: the first non-blank text after the "PHONE:"
+# label, and the href of the first MUI button link. Only visible text in the
+# body is scanned, so serialized app state in <script> tags can't match.
+_TEXT = "text()[not(parent::script or parent::style)]"
+_PHONE_XPATH = etree.XPath(
+    f"(//body//{_TEXT}[contains(translate(., 'phone', 'PHONE'), 'PHONE:')])[1]"
+    f"/following::{_TEXT}[normalize-space()][1]"
+)
+_WEBSITE_XPATH = etree.XPath(
+    "(//*[contains(concat(' ', normalize-space(@class), ' '), ' MuiButtonBase-root ')"
+    " and @href])[1]/@href"
+)
+
+# Same lookup as parse_additional_data, run in the browser: the first non-blank
+# text after the "PHONE:" label, and the href of the first MUI button link.
+# Polls for the rendered details itself so waiting and extracting take a single
+# WebDriver round trip; resolves to null if they don't render in time.
+_EXTRACT_JS = """
+const done = arguments[arguments.length - 1];
+const [timeout, detailsCss, websiteCss] = arguments;
+const deadline = Date.now() + timeout;
+
+function extract() {
+    if (!document.querySelector(detailsCss)) {
+        if (Date.now() < deadline) {
+            setTimeout(extract, 100);
+        } else {
+            done(null);
+        }
+        return;
+    }
+
+    const walker = document.createTreeWalker(
+        document.body,
+        NodeFilter.SHOW_TEXT,
+        (node) => ["SCRIPT", "STYLE"].includes(node.parentNode.nodeName)
+            ? NodeFilter.FILTER_REJECT
+            : NodeFilter.FILTER_ACCEPT,
+    );
+    let phone = null;
+    while (walker.nextNode()) {
+        if (/PHONE:/i.test(walker.currentNode.textContent)) {
+            while (walker.nextNode()) {
+                const text = walker.currentNode.textContent.trim();
+                if (text) {
+                    phone = text;
+                    break;
+                }
+            }
+            break;
+        }
+    }
+    const link = document.querySelector(websiteCss);
+    done({phone: phone, website: link ? link.getAttribute("href") : null});
+}
+
+extract();
+"""
 
 
 class TexasSchoolScraper(BaseSchoolScraper):
     """Implementation of school scraper for Texas schools."""
 
-    def __init__(self, headless: bool = True):
-        super().__init__(headless)
+    fieldnames = [
+        "name",
+        "url",
+        "district",
+        "address",
+        "grades",
+        "phone",
+        "website",
+        "page_number",
+    ]
+
+    def __init__(
+        self,
+        headless: bool = True,
+        pool: Optional[BrowserPool] = None,
+        workers: Optional[int] = None,
+    ):
+        super().__init__(headless, pool, workers)
         self.base_url = "https://txschools.gov/?view=schools&lng=en"
+        self._last_page: Optional[int] = None
+        self._skipped_pages: Set[int] = set()
 
     def apply_filters(self, filters: List[str]):
         """Apply Texas-specific filters to the school search."""
-        self.driver.get(self.base_url)
+        self.load_page(self.driver, self.base_url)
 
-        filter_element = self.wait_for_element(
-            By.XPATH, '//*[@placeholder="Select a grade level"]', condition="clickable"
-        )
+        filter_element = self.wait_for_element(*_FILTER_INPUT, condition="clickable")
 
-        for filter_value in filters:
+        for applied, filter_value in enumerate(filters, start=1):
             filter_element.click()
             filter_element.send_keys(filter_value)
             filter_element.send_keys(Keys.DOWN)
             filter_element.send_keys(Keys.RETURN)
-            time.sleep(1)
-
-    def _process_current_page(self):
-        """Process all rows on the current page."""
-        rows = self.driver.find_elements(By.XPATH, "//table//tbody/tr")
-
-        for row in rows:
-            try:
-                url = row.find_element(By.XPATH, ".//td[1]//a").get_attribute("href")
 
-                if url in self.processed_urls:
-                    continue
-
-                school_data = {
-                    "name": row.find_element(By.XPATH, ".//td[1]//a").text,
-                    "url": url,
-                    "district": row.find_element(By.XPATH, ".//td[2]/a").text,
-                    "address": row.find_element(By.XPATH, ".//td[3]/div").text,
-                    "grades": row.find_element(By.XPATH, ".//td[4]").text,
-                    "phone": None,
-                    "website": None,
-                    "page_number": self.current_page,
-                }
-
-                self.schools_data.append(school_data)
-                self.processed_urls.add(url)
-                self.logger.info(f"Processed school: {school_data['name']}")
-
-            except StaleElementReferenceException:
-                self.logger.warning("Encountered stale element, retrying page")
-                return self._process_current_page()
-            except Exception as e:
-                self.logger.error(f"Error processing row: {str(e)}")
-
-    def _click_with_retry(self, element, max_retries=3):
-        """Click an element with retry mechanism."""
-        for attempt in range(max_retries):
-            try:
-                self.driver.execute_script(
-                    "arguments[0].scrollIntoView(true);", element
-                )
-                element.click()
-                self.wait_for_element(
-                    By.XPATH, "//table//tbody/tr", condition="presence"
-                )
-                return True
-            except (
-                ElementClickInterceptedException,
-                StaleElementReferenceException,
-            ) as e:
-                if attempt == max_retries - 1:
-                    raise e
-                self.logger.warning(
-                    f"Click failed, attempt {attempt + 1} of {max_retries}"
-                )
-                time.sleep(1)
-
-    def get_table_data(self):
-        """Extract school data from all pages."""
-        while True:
+            # Each selected grade level shows up as a chip in the input
             try:
-                self.wait_for_element(
-                    By.XPATH, "//table//tbody/tr", condition="presence"
-                )
-                self._process_current_page()
-
-                next_button = self.wait_for_element(
-                    By.XPATH,
-                    "//button[contains(@aria-label, 'Go to next page')]",
-                    condition="clickable",
+                WebDriverWait(self.driver, 5).until(
+                    lambda d: len(d.find_elements(*_CHIP)) >= applied
                 )
+            except TimeoutException:
+                self.logger.warning(f"Filter not confirmed: {filter_value}")
+
+    def _process_page(self, driver: webdriver.Remote, page: int) -> Optional[bool]:
+        """Process all rows of the page loaded in a driver.
+
+        Returns whether there is a next page, or None if this page had nothing
+        new or is past the last page, in which case the caller should stop.
+        Raises TimeoutException if the page could not be read.
+        """
+        # Snapshot every row in one WebDriver call, extracted in the page itself.
+        # Reloading is safe, processed_ids keeps a retry from adding duplicates.
+        for attempt in range(1, MAX_RETRIES + 1):
+            result = driver.execute_async_script(
+                _PAGE_JS, 10000, _ROW_CSS, _NEXT_CSS
+            )
+            if result is not None:
+                break
+            # Pages past the last one have no rows, another worker found the end
+            with self._lock:
+                if self._last_page is not None and page > self._last_page:
+                    self.logger.debug(f"Page {page} is past the last page")
+                    return None
+            self.logger.warning(
+                f"Timeout waiting for rows on page {page} "
+                f"(attempt {attempt}/{MAX_RETRIES})"
+            )
+            if attempt < MAX_RETRIES:
+                self.load_page(driver, driver.current_url)
+        else:
+            raise TimeoutException(f"No rows on page {page} after {MAX_RETRIES} tries")
+
+        linked = [row for row in result["rows"] if row["url"]]
+        if len(linked) < len(result["rows"]):
+            missing = len(result["rows"]) - len(linked)
+            self.logger.error(f"Skipping {missing} rows without a school link")
+
+        with self._lock:
+            # Drop schools seen on other pages before building any records
+            by_id = {self._school_id(row["url"]): row for row in linked}
+            rows = {
+                school_id: row
+                for school_id, row in by_id.items()
+                if school_id not in self.processed_ids
+            }
+            self.processed_ids.update(rows)
+
+            schools = [
+                {**row, "phone": None, "website": None, "page_number": page}
+                for row in rows.values()
+            ]
+            for school in schools:
+                self.logger.debug("Processed school: %s", school["name"])
+            self.add_schools(schools)
+
+        self.logger.info("Page %d: processed %d new schools", page, len(schools))
+        if linked and not schools:
+            self.logger.warning(f"No new schools on page {page}, stopping")
+            return None
+        return result["hasNext"]
+
+    def _school_id(self, url: str) -> int:
+        """Key a school by the numeric id in its URL, falling back to the URL."""
+        match = _ID_RE.search(url)
+        return int(match.group(1)) if match else hash(url)
+
+    def _page_url(self, search_url: str, page: int) -> str:
+        """Build the URL of a results page from the filtered search URL."""
+        parts = urlparse(search_url)
+        query = parse_qs(parts.query, keep_blank_values=True)
+        query["page"] = [str(page)]
+        return urlunparse(parts._replace(query=urlencode(query, doseq=True)))
+
+    def _scrape_pages(self, search_url: str, first_page: int, step: int):
+        """Scrape every `step`-th results page, from `first_page`, with one driver."""
+        driver = self.pool.acquire()
+        pages = skips = 0
+        try:
+            page = first_page
+            while self._last_page is None or page <= self._last_page:
+                self.load_page(driver, self._page_url(search_url, page))
+                pages += 1
+
+                # Skip a page that can't be read, the rest of the shard may be fine
+                try:
+                    has_next = self._process_page(driver, page)
+                except TimeoutException as e:
+                    self.logger.error(e.msg)
+                    with self._lock:
+                        self._skipped_pages.add(page)
+                    skips += 1
+                    if skips >= MAX_CONSECUTIVE_SKIPS:
+                        break
+                    page += step
+                    continue
+                skips = 0
 
-                if not next_button or "disabled" in next_button.get_attribute("class"):
-                    self.logger.info("Reached last page")
+                if has_next is None:
                     break
+                if not has_next:
+                    with self._lock:
+                        if self._last_page is None or page < self._last_page:
+                            self._last_page = page
+                    break
+                page += step
+        finally:
+            self.pool.release(driver, pages)
 
-                self._click_with_retry(next_button)
-                self.current_page += 1
-                self.logger.info(f"Moving to page {self.current_page}")
-
-            except Exception as e:
-                self.logger.error(f"Error during pagination: {str(e)}")
-                break
+    def get_table_data(self):
+        """Extract school data from all pages, sharded across pooled drivers."""
+        # The filters are reflected in the URL, so pages can be opened directly
+        search_url = self.driver.current_url
+        try:
+            has_next = self._process_page(self.driver, 1)
+        except TimeoutException as e:
+            self.logger.error(e.msg)
+            self._skipped_pages.add(1)
+            has_next = False
+
+        # Hand the driver back so the page workers can lease every pooled driver
+        self.pool.release(self.driver)
+        self.driver = None
+        self.wait = None
+        if not has_next:
+            self.logger.info("Reached last page")
+            self._report_skipped_pages()
+            return
+
+        # Worker i loads pages 2 + i, 2 + i + K, 2 + i + 2K, ...
+        workers = self.pool.size
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(self._scrape_pages, search_url, 2 + i, workers)
+                for i in range(workers)
+            ]
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                except Exception as e:
+                    self.logger.error(f"Error during pagination: {str(e)}")
+
+        self.logger.info(f"Reached last page: {self._last_page}")
+        self._report_skipped_pages()
+
+    def _report_skipped_pages(self):
+        """Warn about results pages that could not be read."""
+        # Pages past the last one never have rows, they are expected to fail
+        skipped = sorted(
+            page
+            for page in self._skipped_pages
+            if self._last_page is None or page <= self._last_page
+        )
+        if skipped:
+            self.logger.warning(
+                f"Skipped {len(skipped)} unreadable results pages: {skipped}"
+            )
 
     def run(self, filters: List[str], output_file: str):
         """Execute the Texas school scraping process."""
         try:
             self.setup_driver()
+            self.open_output(output_file)
             self.apply_filters(filters)
             self.get_table_data()
             self.save_data(output_file)
@@ -138,43 +357,68 @@ class TexasSchoolScraper(BaseSchoolScraper):
 class TexasSchoolEnricher(BaseSchoolEnricher):
     """Implementation of school enricher for Texas schools."""
 
+    # Set group_column = "district" to copy district-wide contact details
+    group_fields = ["phone", "website"]
+    column_dtypes = {
+        "name": "string[pyarrow]",
+        "url": "string[pyarrow]",
+        "district": "string[pyarrow]",
+        "address": "string[pyarrow]",
+        "grades": "string[pyarrow]",
+        "phone": "string[pyarrow]",
+        "website": "string[pyarrow]",
+        "page_number": "Int64",
+    }
+
     def has_complete_data(self, row: pd.Series) -> bool:
         """Check if a school record already has complete data."""
         return pd.notna(row["phone"]) and pd.notna(row["website"])
 
-    def extract_additional_data(self, row: pd.Series) -> Dict:
-        """Extract additional data for a Texas school."""
-        try:
-            self.wait_for_element(By.CLASS_NAME, "jss16")
-
-            soup = BeautifulSoup(self.driver.page_source, "html.parser")
-
-            # Extract phone
-            phone = None
-            phone_section = soup.find(string=re.compile("PHONE:", re.IGNORECASE))
-            if phone_section:
-                phone_text = phone_section.find_next(string=True)
-                if phone_text:
-                    phone = phone_text.strip()
+    @classmethod
+    def incomplete_mask(cls, df: pd.DataFrame) -> pd.Series:
+        """Boolean mask of the rows missing a phone or a website."""
+        return ~(df["phone"].notna() & df["website"].notna())
 
-            # Extract website
-            website = None
-            website_button = soup.find(href=True, class_="MuiButtonBase-root")
-            if website_button and website_button.get("href"):
-                website = website_button["href"]
+    def is_rendered(self, html: str) -> bool:
+        """Check if the school details are present in the raw HTML."""
+        return "jss16" in html or _PHONE_LABEL_RE.search(html) is not None
 
-            return {"phone": phone, "website": website}
+    def extract_additional_data(
+        self, row: pd.Series, driver: webdriver.Remote
+    ) -> Dict:
+        """Extract additional data for a Texas school."""
+        try:
+            data = driver.execute_async_script(
+                _EXTRACT_JS, 10000, _DETAILS_CSS, _WEBSITE_CSS
+            )
+            if data is None:
+                self.logger.error(f"Timeout waiting for element: {_DETAILS_CSS}")
+                return {"phone": None, "website": None}
+            return data
 
         except Exception as e:
             self.logger.error(f"Error extracting data: {str(e)}")
             return {"phone": None, "website": None}
 
+    @staticmethod
+    def parse_additional_data(html: str) -> Dict:
+        """Extract phone and website from a Texas school page."""
+        tree = lxml.html.fromstring(html)
+
+        phone = _PHONE_XPATH(tree)
+        website = _WEBSITE_XPATH(tree)
+
+        return {
+            "phone": phone[0].strip() if phone else None,
+            "website": website[0] if website else None,
+        }
+
     def log_final_statistics(
         self, df: pd.DataFrame, total_schools: int, output_file: str
     ):
         """Log final statistics about the enrichment process."""
-        final_phones = len(df[df["phone"].notna()])
-        final_websites = len(df[df["website"].notna()])
+        final_phones = int(df["phone"].notna().sum())
+        final_websites = int(df["website"].notna().sum())
 
         self.logger.info(f"""
         Enrichment completed:
@@ -186,12 +430,18 @@ class TexasSchoolEnricher(BaseSchoolEnricher):
 
 
 if __name__ == "__main__":
-    # Example usage
-    scraper = TexasSchoolScraper()
-    scraper.run(
-        filters=["Prekindergarten", "Kindergarten", "Early Education"],
-        output_file="texas_schools_basic_data.csv",
-    )
-
-    enricher = TexasSchoolEnricher("texas_schools_basic_data.csv")
-    enricher.run()
+    configure_logging()
+
+    # Example usage, sharing the browsers between both steps
+    pool = create_browser_pool()
+    try:
+        scraper = TexasSchoolScraper(pool=pool)
+        scraper.run(
+            filters=["Prekindergarten", "Kindergarten", "Early Education"],
+            output_file="texas_schools_basic_data.parquet",
+        )
+
+        enricher = TexasSchoolEnricher("texas_schools_basic_data.parquet", pool=pool)
+        enricher.run()
+    finally:
+        pool.close()
@@ -0,0 +1,19 @@
+import pandas as pd
+import pytest
+from scrapers.texas import TexasSchoolEnricher
+
+
+@pytest.fixture
+def enricher(tmp_path):
+    enricher = TexasSchoolEnricher(str(tmp_path / "schools.csv"))
+    enricher.df = pd.DataFrame(
+        {
+            "name": ["A", "B", "C"],
+            "url": ["u0", "u1", "u2"],
+            "phone": [None, None, None],
+            "website": [None, None, None],
+        }
+    )
+    enricher.checkpoint.start()
+    yield enricher
+    enricher.checkpoint.remove()
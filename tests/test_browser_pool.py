@@ -0,0 +1,54 @@
+import logging
+
+from base.browser_pool import BrowserPool
+from scrapers.texas import TexasSchoolEnricher
+
+
+class FakeDriver:
+    def __init__(self):
+        self.quit_called = False
+
+    def quit(self):
+        self.quit_called = True
+
+
+def test_pool_reuses_a_driver_until_max_pages():
+    pool = BrowserPool(FakeDriver, size=1, max_pages=3)
+
+    with pool.lease() as first:
+        pass
+    driver = pool.acquire()
+    pool.release(driver, pages=1)
+    with pool.lease() as third:
+        pass
+    with pool.lease() as fourth:
+        pass
+
+    assert first is driver is third
+    assert first.quit_called
+    assert fourth is not first and not fourth.quit_called
+
+
+def test_pool_starts_drivers_lazily_and_close_quits_them():
+    created = []
+    pool = BrowserPool(lambda: created.append(FakeDriver()) or created[-1], size=2)
+
+    assert created == []
+    driver = pool.acquire()
+    pool.release(driver)
+    pool.close()
+
+    assert len(created) == 1 and driver.quit_called
+
+
+def test_injected_pool_warns_only_for_explicit_workers(caplog, tmp_path):
+    pool = BrowserPool(FakeDriver, size=2)
+    path = str(tmp_path / "in.csv")
+
+    with caplog.at_level(logging.WARNING):
+        TexasSchoolEnricher(path, pool=pool)
+    assert not caplog.records
+
+    with caplog.at_level(logging.WARNING):
+        TexasSchoolEnricher(path, workers=8, pool=pool)
+    assert "pool of 2 browsers, not 8 workers" in caplog.text
@@ -0,0 +1,61 @@
+import json
+
+import pandas as pd
+from base.checkpoint import JsonlCheckpoint
+from scrapers.texas import TexasSchoolEnricher
+
+
+def test_checkpoint_round_trip_skips_truncated_line(tmp_path):
+    path = tmp_path / "run.ckpt.jsonl"
+    checkpoint = JsonlCheckpoint(str(path))
+    checkpoint.start()
+    checkpoint.write({"url": "a", "phone": "1"})
+    checkpoint.write({"url": "b", "phone": None})
+    checkpoint.close()
+    with open(path, "a") as f:
+        f.write('{"url": "c", "pho')
+
+    assert JsonlCheckpoint(str(path)).load() == {
+        "a": {"phone": "1"},
+        "b": {"phone": None},
+    }
+
+
+def test_checkpoint_load_missing_file(tmp_path):
+    assert JsonlCheckpoint(str(tmp_path / "missing.jsonl")).load() == {}
+
+
+def test_record_result_skips_failures(enricher):
+    enricher.record_result(0, {"phone": None, "website": None})
+    enricher.record_result(1, {})
+    enricher.record_result(2, {"phone": "p2", "website": None})
+    enricher.checkpoint.close()
+
+    assert enricher.checkpoint.load() == {"u2": {"phone": "p2", "website": None}}
+
+
+class OfflineEnricher(TexasSchoolEnricher):
+    def enrich(self, indices):
+        self.enriched = indices
+
+
+def test_resumed_run_skips_checkpointed_schools(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    pd.DataFrame(
+        {
+            "name": ["A", "B", "C"],
+            "url": ["u0", "u1", "u2"],
+            "phone": [None, None, "p2"],
+            "website": [None, None, "w2"],
+        }
+    ).to_csv("schools.csv", index=False)
+    with open("schools.csv.ckpt.jsonl", "w") as f:
+        f.write(json.dumps({"url": "u0", "phone": "p0", "website": "w0"}) + "\n")
+
+    enricher = OfflineEnricher("schools.csv")
+    enricher.run()
+
+    assert enricher.enriched == [1]
+    output = pd.read_csv("enriched_schools.csv")
+    assert output.loc[0, ["phone", "website"]].tolist() == ["p0", "w0"]
+    assert not (tmp_path / "schools.csv.ckpt.jsonl").exists()
@@ -0,0 +1,95 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+from base.base_scraper import read_table, write_csv
+from scrapers.texas import TexasSchoolEnricher
+
+STATIC_PAGE = (
+    "<html><body><p>PHONE:</p><p> (555) 000-0001 </p>"
+    '<a class="MuiButtonBase-root" href="http://school.org">Website</a>'
+    "</body></html>"
+)
+
+
+def process(enricher, batch, pages):
+    async def run():
+        with ProcessPoolExecutor(max_workers=1) as parser:
+            return await enricher.process_schools(parser, batch, pages)
+
+    return asyncio.run(run())
+
+
+def test_process_schools_sends_unrendered_and_failed_pages_to_browser(enricher):
+    fallback = process(
+        enricher,
+        [0, 1, 2],
+        [STATIC_PAGE, '<html><body><div id="root"></div></body></html>', OSError()],
+    )
+
+    assert fallback == [1, 2]
+    assert enricher.df.loc[0, ["phone", "website"]].tolist() == [
+        "(555) 000-0001",
+        "http://school.org",
+    ]
+    assert enricher.df.loc[[1, 2], "phone"].isna().all()
+
+
+def test_read_table_applies_dtypes_and_keeps_other_columns(tmp_path):
+    path = tmp_path / "schools.csv"
+    path.write_text("name,url,phone,website,extra\nA,u,,,x\n")
+
+    df = read_table(str(path), TexasSchoolEnricher.column_dtypes)
+
+    assert df.columns.tolist() == ["name", "url", "phone", "website", "extra"]
+    assert df["phone"].dtype == "string[pyarrow]"
+    assert df["phone"].isna().all()
+    assert df.at[0, "extra"] == "x"
+
+
+def test_read_table_parquet_casts_only_present_columns(tmp_path):
+    path = str(tmp_path / "schools.parquet")
+    pd.DataFrame({"name": ["A"], "page_number": [1], "extra": [2.5]}).to_parquet(path)
+
+    df = read_table(path, TexasSchoolEnricher.column_dtypes)
+
+    assert df.dtypes.astype(str).to_dict() == {
+        "name": "string",
+        "page_number": "Int64",
+        "extra": "float64",
+    }
+
+
+def test_write_csv_quotes_only_when_needed(tmp_path):
+    path = tmp_path / "out.csv"
+    df = pd.DataFrame({"name": ["A, B", "C"], "phone": [None, "555"]})
+
+    write_csv(df, str(path))
+
+    assert path.read_text().splitlines() == ["name,phone", '"A, B",', "C,555"]
+
+
+def test_process_schools_sends_pages_without_data_to_browser(enricher):
+    # The label only appears in a script of the app shell
+    shell = '<html><body><script>const label = "Phone: ";</script></body></html>'
+
+    fallback = process(enricher, [0], [shell])
+
+    enricher.checkpoint.close()
+
+    assert fallback == [0]
+    assert enricher.checkpoint.load() == {}
+
+
+def test_apply_updates_only_fills_missing_values(enricher):
+    enricher.df.loc[0, "phone"] = "kept"
+
+    enricher.apply_updates(
+        [(0, {"phone": "new", "website": "w0"}), (2, {"phone": "p2", "other": 1})]
+    )
+
+    assert enricher.df.loc[[0, 2], "phone"].tolist() == ["kept", "p2"]
+    assert enricher.df.at[0, "website"] == "w0"
+    assert enricher.df.loc[[1, 2], "website"].isna().all()
+    assert "other" not in enricher.df.columns
+    assert enricher.processed_count == 2
@@ -0,0 +1,73 @@
+import pandas as pd
+import pytest
+from scrapers.texas import TexasSchoolEnricher
+
+
+class DistrictEnricher(TexasSchoolEnricher):
+    group_column = "district"
+
+
+@pytest.fixture
+def enricher(tmp_path):
+    enricher = DistrictEnricher(str(tmp_path / "schools.csv"))
+    enricher.df = pd.DataFrame(
+        {
+            "url": [f"u{i}" for i in range(9)],
+            "name": [f"S{i}" for i in range(9)],
+            "district": ["A", "A", "A", "A", "B", "B", "B", None, "C"],
+            "phone": [None] * 9,
+            "website": [None] * 9,
+        }
+    )
+    enricher.checkpoint.start()
+    yield enricher
+    enricher.checkpoint.remove()
+
+
+def test_split_groups_samples_first_rows_and_rows_without_group(enricher):
+    sampled, deferred = enricher.split_groups(list(range(9)))
+
+    assert sampled == [0, 1, 4, 5, 7, 8]
+    assert deferred == [2, 3, 6]
+
+
+def test_propagate_copies_only_uniform_groups(enricher):
+    sampled, deferred = enricher.split_groups(list(range(9)))
+    enricher.df.loc[[0, 1], ["phone", "website"]] = [["pa", "wa"], ["pa", "wa"]]
+    enricher.df.loc[[4, 5], ["phone", "website"]] = [["pb", "wb"], ["qb", "wb"]]
+
+    remaining = enricher.propagate_group_data(sampled, deferred)
+
+    assert remaining == [6]
+    assert enricher.df.loc[[2, 3], "phone"].tolist() == ["pa", "pa"]
+    assert enricher.df.loc[[2, 3], "website"].tolist() == ["wa", "wa"]
+    assert enricher.df.loc[[6, 7, 8], "phone"].isna().all()
+
+
+def test_propagate_maps_each_row_to_its_own_group(enricher):
+    enricher.df["district"] = ["A", "B", "A", "B", "A", "B", "A", "B", "A"]
+    sampled, deferred = enricher.split_groups(list(range(9)))
+    enricher.df.loc[sampled, ["phone", "website"]] = [
+        ["pa", "wa"],
+        ["pb", "wb"],
+        ["pa", "wa"],
+        ["pb", "wb"],
+    ]
+
+    remaining = enricher.propagate_group_data(sampled, deferred)
+
+    assert remaining == []
+    assert enricher.df.loc[deferred, "phone"].tolist() == ["pa", "pb", "pa", "pb", "pa"]
+
+
+def test_propagate_needs_values_in_every_field_and_enough_samples(enricher):
+    enricher.group_sample_size = 3
+    sampled, deferred = enricher.split_groups(list(range(9)))
+    # A has a missing website, B has the same values but only two samples
+    enricher.df.loc[[0, 1, 2], "phone"] = "pa"
+    enricher.df.loc[[4, 5, 6], ["phone", "website"]] = [["pb", "wb"]] * 3
+
+    remaining = enricher.propagate_group_data(sampled, deferred)
+
+    assert remaining == deferred == [3]
+    assert pd.isna(enricher.df.at[3, "phone"])
@@ -0,0 +1,36 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from base.rate_limiter import RateLimiter
+
+
+def elapsed(func, *args):
+    start = time.monotonic()
+    func(*args)
+    return time.monotonic() - start
+
+
+def test_acquire_allows_a_burst_then_waits_for_tokens():
+    limiter = RateLimiter(rate=20, capacity=2)
+
+    assert elapsed(lambda: [limiter.acquire() for _ in range(2)]) < 0.02
+    assert 0.03 < elapsed(limiter.acquire) < 0.2
+
+
+def test_acquire_is_shared_between_threads():
+    limiter = RateLimiter(rate=20, capacity=2)
+
+    def acquire_all():
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            list(executor.map(lambda _: limiter.acquire(), range(6)))
+
+    # Two tokens are available up front, the other four come at 20 per second
+    assert 0.18 < elapsed(acquire_all) < 0.5
+
+
+def test_acquire_async_waits_for_a_token():
+    limiter = RateLimiter(rate=20, capacity=1)
+    limiter.acquire()
+
+    assert 0.03 < elapsed(asyncio.run, limiter.acquire_async()) < 0.2
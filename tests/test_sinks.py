@@ -0,0 +1,36 @@
+import pandas as pd
+from base.sinks import CsvSink, ParquetSink, open_sink
+
+
+def test_parquet_sink_types_all_null_columns_as_strings(tmp_path):
+    path = str(tmp_path / "schools.parquet")
+    fieldnames = ["name", "phone", "page_number"]
+    sink = ParquetSink(path, fieldnames, row_group_size=2)
+    sink.write([{"name": "A", "phone": None, "page_number": 1}])
+    sink.write([{"name": "B", "phone": None, "page_number": 1}])
+    sink.write([{"name": "C", "phone": "555", "page_number": 2}])
+    sink.close()
+
+    df = pd.read_parquet(path)
+    assert df["name"].tolist() == ["A", "B", "C"]
+    assert df["phone"].tolist() == [None, None, "555"]
+    assert df["page_number"].tolist() == [1, 1, 2]
+
+
+def test_parquet_sink_without_records_keeps_columns(tmp_path):
+    path = str(tmp_path / "empty.parquet")
+    ParquetSink(path, ["name", "url"]).close()
+
+    assert pd.read_parquet(path).columns.tolist() == ["name", "url"]
+
+
+def test_open_sink_picks_format_by_extension(tmp_path):
+    parquet = open_sink(str(tmp_path / "a.parquet"), ["name"])
+    csv = open_sink(str(tmp_path / "a.csv"), ["name"])
+    csv.write([{"name": "A"}])
+    parquet.close()
+    csv.close()
+
+    assert isinstance(parquet, ParquetSink)
+    assert isinstance(csv, CsvSink)
+    assert (tmp_path / "a.csv").read_text().splitlines() == ["name", "A"]
@@ -0,0 +1,56 @@
+from scrapers.texas import TexasSchoolEnricher, TexasSchoolScraper
+
+
+def test_page_url_sets_the_page_and_keeps_filters():
+    scraper = TexasSchoolScraper()
+    url = scraper._page_url(
+        "https://txschools.gov/?view=schools&lng=en&grade=PK&page=1", 7
+    )
+
+    assert url == "https://txschools.gov/?view=schools&lng=en&grade=PK&page=7"
+    assert scraper._page_url("https://txschools.gov/?view=schools", 2).endswith(
+        "view=schools&page=2"
+    )
+
+
+def test_school_id_uses_numeric_id_or_falls_back_to_url():
+    scraper = TexasSchoolScraper()
+    url = "https://txschools.gov/?view=school&lng=en"
+
+    assert scraper._school_id("https://txschools.gov/?view=school&id=0042") == 42
+    assert scraper._school_id(url) == hash(url)
+
+
+def test_parse_additional_data_reads_phone_and_first_button_link():
+    html = """
+    <html><body>
+      <div class="jss16"><span>Phone:</span> <span> </span><span> (956) 969-6620 </span>
+      <a class="MuiButtonBase-root MuiButton-root" href="http://www.wisd.us">Web</a>
+      <a class="MuiButtonBase-root" href="http://other.org">Other</a></div>
+    </body></html>
+    """
+
+    assert TexasSchoolEnricher.parse_additional_data(html) == {
+        "phone": "(956) 969-6620",
+        "website": "http://www.wisd.us",
+    }
+
+
+def test_parse_additional_data_without_details():
+    html = "<html><body><a class='MuiButtonBaseX' href='x'>x</a></body></html>"
+
+    assert TexasSchoolEnricher.parse_additional_data(html) == {
+        "phone": None,
+        "website": None,
+    }
+
+
+def test_parse_additional_data_ignores_script_and_style_text():
+    html = """
+    <html><head><style>.phone:after { content: "PHONE:" }</style></head><body>
+      <script>window.labels = {"phone": "Phone:"};</script>
+      <p>PHONE:</p><script>"(000) 000-0000"</script><p>(512) 555-0100</p>
+    </body></html>
+    """
+
+    assert TexasSchoolEnricher.parse_additional_data(html)["phone"] == "(512) 555-0100"